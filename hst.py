@@ -9,11 +9,16 @@ Revision Date: 2025-09-06
 Author: Dr. Eric O. Flores
 """
 
+import io
 import os
 import time
+import codecs
 import shlex
 import shutil
 import queue
+import selectors
+import collections
+import functools
 import platform
 import datetime
 import subprocess
@@ -28,13 +33,32 @@ try:
 except Exception:
     HAS_PSUTIL = False
 
+# Optional dependency for pre-rendered (anti-aliased) gauge arcs
+try:
+    from PIL import Image, ImageDraw, ImageTk
+    HAS_PIL = True
+except Exception:
+    HAS_PIL = False
+
 APP_NAME = "Hardware Stress Testing Tool"
 VERSION = "2.0"
 REVISION_DATE = "2025-09-06"
 AUTHOR = "Dr. Eric O. Flores"
 
+# Resolved once; platform.system() costs a uname() call each time
+_SYS = platform.system()
+IS_LINUX = _SYS == "Linux"
+IS_MAC = _SYS == "Darwin"
+IS_WINDOWS = _SYS == "Windows"
+
+READ_CHUNK_SIZE = 65536       # bytes per os.read() on the child's stdout pipe
+MAX_OUTPUT_LINES = 5000       # scrollback kept in the output pane
+LOG_BUFFER_SIZE = 1 << 20     # 1 MiB write buffer for per-test log files
+UI_TICK_MS = 100              # period of the single Tk after() loop
+
 LOG_DIR = os.path.join(os.path.expanduser("~"), "HardwareStressTest", "logs")
 os.makedirs(LOG_DIR, exist_ok=True)
+_LOG_PREFIX = os.path.join(LOG_DIR, "")   # LOG_DIR with trailing separator
 
 REQUIRED_CMDS = {
     "cpu": ["stress-ng"],
@@ -44,8 +68,46 @@ REQUIRED_CMDS = {
     "net": ["iperf3"],
 }
 
+@functools.lru_cache(maxsize=None)
+def _scan_path_files(path_value: str) -> dict[str, list[str]]:
+    # One scandir pass over every PATH directory, cached per PATH value.
+    # is_file() comes from the directory entry's d_type on Linux, so the scan
+    # itself doesn't stat; executability is checked only for names looked up.
+    table: dict[str, list[str]] = {}
+    for d in path_value.split(os.pathsep):
+        if not d:
+            continue
+        try:
+            with os.scandir(d) as it:
+                for e in it:
+                    try:
+                        if e.is_file():
+                            table.setdefault(e.name, []).append(e.path)
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+    return table
+
+@functools.lru_cache(maxsize=None)
+def _which_windows(cmd: str) -> str | None:
+    return shutil.which(cmd)  # needs PATHEXT handling
+
+def _clear_which_cache():
+    _scan_path_files.cache_clear()
+    _which_windows.cache_clear()
+
+def _which(cmd: str) -> str | None:
+    # Cached; Tools → Rescan Dependencies calls _clear_which_cache().
+    if IS_WINDOWS:
+        return _which_windows(cmd)
+    for path in _scan_path_files(os.environ.get("PATH", os.defpath)).get(cmd, ()):
+        if os.access(path, os.X_OK):
+            return path
+    return None
+
 def which_or_hint(cmd: str) -> str:
-    path = shutil.which(cmd)
+    path = _which(cmd)
     if path:
         return path
     hint_map = {
@@ -57,8 +119,10 @@ def which_or_hint(cmd: str) -> str:
     hint = hint_map.get(cmd, f"Please install '{cmd}'.")
     return f"NOT FOUND ({hint})"
 
+_TS_FMT = "%Y-%m-%d_%H-%M-%S"
+
 def timestamp() -> str:
-    return datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    return time.strftime(_TS_FMT)
 
 # -------------------------
 # DonutGauge (labels above arc; compact)
@@ -71,7 +135,16 @@ class DonutGauge(tk.Canvas):
       - Center % and caption below.
       - Text is black for maximum legibility.
       - Start angle 280°, extent scales with value.
+      - With Pillow installed, the value arc is drawn from anti-aliased masks
+        pre-rendered per percent bucket on a background thread; each shown
+        bucket is colored into a PhotoImage once, so updates are an image swap.
     """
+    # (arc extent, center text) for every integer percent 0..100
+    _TABLE = tuple((280.0 * i / 100.0, f"{i}%") for i in range(101))
+    # Arc alpha masks per geometry, shared by every gauge of that size
+    _MASKS: dict[tuple, list] = {}
+    _MASKS_LOCK = threading.Lock()
+
     def __init__(self, master, width=200, height=160, **kw):
         # FIXED: Provide a safe default 'bg' color instead of reading from ttk parent.
         # The .cget("background") call fails on modern ttk widgets.
@@ -103,14 +176,27 @@ class DonutGauge(tk.Canvas):
                                        fill=self.text_color, font=("TkDefaultFont", 10, "bold"))
         self.id_track = self.create_arc(self.bbox, start=280, extent=280, style="arc",
                                         width=self.arc_width, outline=self.track_color)
-        self.id_arc = self.create_arc(self.bbox, start=280, extent=0, style="arc",
-                                      width=self.arc_width, outline=self.arc_color)
+        if HAS_PIL:
+            # Only the part of the arc's square that falls inside the canvas
+            x0, y0 = self.bbox[0] - self.arc_width / 2, self.bbox[1] - self.arc_width / 2
+            size = int(round(self.bbox[2] - self.bbox[0] + self.arc_width))
+            vis_h = max(1, min(size, int(self.h - y0)))
+            self._geom = (size, vis_h, self.arc_width)
+            self._masks = self._masks_for(self._geom)
+            self._frames: dict[int, "ImageTk.PhotoImage"] = {}   # pct -> frame in arc_color
+            self.id_arc = self.create_image(x0, y0, anchor="nw")
+        else:
+            self.id_arc = self.create_arc(self.bbox, start=280, extent=0, style="arc",
+                                          width=self.arc_width, outline=self.arc_color)
         self.id_val = self.create_text(self.cx, self.cy, text="", fill=self.text_color,
                                        font=("TkDefaultFont", 12, "bold"))
         self.id_cap = self.create_text(self.cx, self.h - 12, text="", fill=self.caption_color,
                                        font=("TkDefaultFont", 10))
 
         self.value = 0.0
+        # Last values pushed to Tk, so set() can skip no-op itemconfigure calls
+        self._last_pct: int | None = None
+        self._last_cap: str | None = None
 
     # Public API
     def set_label(self, text: str):
@@ -118,14 +204,34 @@ class DonutGauge(tk.Canvas):
 
     def set_colors(self, arc_color: str):
         self.arc_color = arc_color
-        self.itemconfigure(self.id_arc, outline=self.arc_color)
+        if HAS_PIL:
+            self._frames.clear()
+            if self._last_pct is not None:
+                self.itemconfigure(self.id_arc, image=self._frame(self._last_pct))
+        else:
+            self.itemconfigure(self.id_arc, outline=self.arc_color)
         self._refresh_caption_color()
 
     def set(self, value: float, caption: str):
-        self.value = max(0.0, min(1.0, float(value)))
-        self.itemconfigure(self.id_arc, extent=280.0 * self.value)
-        self.itemconfigure(self.id_val, text=f"{int(round(self.value*100))}%")
-        self.itemconfigure(self.id_cap, text=caption)
+        value = max(0.0, min(1.0, float(value)))
+        # Ignore jitter below 1% against the last rendered value; self.value
+        # is left alone so slow drift still accumulates into an update.
+        if (self._last_pct is not None and abs(value - self.value) < 0.01
+                and caption == self._last_cap):
+            return
+        self.value = value
+        pct = int(round(self.value * 100))
+        if pct != self._last_pct:
+            extent, val_txt = self._TABLE[pct]
+            if HAS_PIL:
+                self.itemconfigure(self.id_arc, image=self._frame(pct))
+            else:
+                self.itemconfigure(self.id_arc, extent=extent)
+            self.itemconfigure(self.id_val, text=val_txt)
+            self._last_pct = pct
+        if caption != self._last_cap:
+            self.itemconfigure(self.id_cap, text=caption)
+            self._last_cap = caption
 
     def set_theme(self, *, bg="#EFEFEF", track="#c7ced6", text="#000000",
                   caption="#000000", color_code_caption=False):
@@ -141,6 +247,49 @@ class DonutGauge(tk.Canvas):
     def _refresh_caption_color(self):
         self.itemconfigure(self.id_cap, fill=(self.arc_color if self.caption_color_coded else self.caption_color))
 
+    def _frame(self, pct: int):
+        # Colored once per (arc color, bucket) actually shown, then reused.
+        frame = self._frames.get(pct)
+        if frame is None:
+            mask = self._masks[pct]
+            if mask is None:  # background pre-render hasn't reached it yet
+                mask = self._masks[pct] = self._render_mask(self._geom, pct)
+            im = Image.new("RGBA", mask.size, self.arc_color)
+            im.putalpha(mask)
+            frame = self._frames[pct] = ImageTk.PhotoImage(im, master=self)
+        return frame
+
+    @classmethod
+    def _masks_for(cls, geom: tuple) -> list:
+        # Masks are color-independent, so one background render serves all
+        # gauges of this size and survives set_colors().
+        with cls._MASKS_LOCK:
+            masks = cls._MASKS.get(geom)
+            if masks is None:
+                masks = cls._MASKS[geom] = [None] * len(cls._TABLE)
+                threading.Thread(target=cls._prerender_masks, args=(geom, masks), daemon=True).start()
+        return masks
+
+    @classmethod
+    def _prerender_masks(cls, geom: tuple, masks: list):
+        for pct in range(len(masks)):
+            if masks[pct] is None:
+                masks[pct] = cls._render_mask(geom, pct)
+
+    @classmethod
+    def _render_mask(cls, geom: tuple, pct: int):
+        # Draw at 2x and downsample for anti-aliasing. Tk arcs run
+        # counter-clockwise from 3 o'clock, PIL arcs clockwise, so Tk's
+        # start=280/extent=e becomes PIL's 80-e .. 80.
+        size, vis_h, width = geom
+        ss = 2
+        im = Image.new("L", (size * ss, vis_h * ss), 0)
+        extent = cls._TABLE[pct][0]
+        if extent > 0:
+            ImageDraw.Draw(im).arc((0, 0, size * ss - 1, size * ss - 1),
+                                   start=80 - extent, end=80, fill=255, width=width * ss)
+        return im.resize((size, vis_h), Image.LANCZOS)
+
 # -------------------------
 # Background command runner
 # -------------------------
@@ -152,8 +301,19 @@ class CommandRunner:
         self.process: subprocess.Popen | None = None
         self.thread: threading.Thread | None = None
         self._stop_flag = threading.Event()
-
-    def start(self, command, cwd=None, shell=False, env=None):
+        # Self-pipe: stop() writes a byte here to wake the reader's select().
+        # POSIX only; Windows reads block and stop() terminates the child.
+        if not IS_WINDOWS:
+            self._wake_r, self._wake_w = os.pipe()
+            os.set_blocking(self._wake_r, False)
+            os.set_blocking(self._wake_w, False)
+        # One decoder reused for the whole run: handles UTF-8 sequences split
+        # across reads and translates \r\n / \r like text-mode pipes did.
+        self._dec = io.IncrementalNewlineDecoder(
+            codecs.getincrementaldecoder("utf-8")(errors="replace"), translate=True)
+
+    def start(self, command: list[str], cwd=None, shell=False, env=None):
+        # command is always an argv list; callers tokenize any free-form input.
         if self.thread and self.thread.is_alive():
             raise RuntimeError("A command is already running.")
         self._stop_flag.clear()
@@ -162,16 +322,24 @@ class CommandRunner:
 
     def _run(self, command, cwd, shell, env):
         try:
-            popen_cmd = command if (shell or isinstance(command, (list, tuple))) else shlex.split(command)
+            self._dec.reset()
+            if not IS_WINDOWS:
+                self._drain_wake()
             self.process = subprocess.Popen(
-                popen_cmd, cwd=cwd, shell=shell, env=env,
+                command, cwd=cwd, shell=shell, env=env,
                 stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
-                text=True, bufsize=1, universal_newlines=True,
+                bufsize=-1,
             )
-            for line in self.process.stdout:  # type: ignore
-                if self._stop_flag.is_set():
-                    break
-                self.on_line(line)
+            # Read whatever the pipe has in large blocks instead of line by line;
+            # on chatty tools this cuts syscalls and per-line Python overhead.
+            fd = self.process.stdout.fileno()  # type: ignore
+            if IS_WINDOWS:
+                self._read_blocking(fd)
+            else:
+                self._read_selecting(fd)
+            tail = self._dec.decode(b"", final=True)
+            if tail:
+                self.on_line(tail)
 
             if self._stop_flag.is_set() and self.process and self.process.poll() is None:
                 try:
@@ -194,8 +362,57 @@ class CommandRunner:
         finally:
             self.process = None
 
+    def _read_selecting(self, fd: int):
+        # The wake pipe lets Stop interrupt select() even if the child is silent.
+        with selectors.DefaultSelector() as sel:
+            sel.register(fd, selectors.EVENT_READ)
+            sel.register(self._wake_r, selectors.EVENT_READ)
+            while not self._stop_flag.is_set():
+                ready = {key.fd for key, _ in sel.select()}
+                if self._wake_r in ready:
+                    self._drain_wake()
+                if fd not in ready:
+                    continue
+                if not self._read_chunk(fd):
+                    break
+
+    def _read_blocking(self, fd: int):
+        # Windows: select() only accepts sockets, so block in os.read();
+        # stop() terminates the child, which closes the pipe and ends the read.
+        while not self._stop_flag.is_set():
+            if not self._read_chunk(fd):
+                break
+
+    def _read_chunk(self, fd: int) -> bool:
+        chunk = os.read(fd, READ_CHUNK_SIZE)
+        if not chunk:
+            return False
+        text = self._dec.decode(chunk, final=False)
+        if text:
+            self.on_line(text)
+        return True
+
     def stop(self):
         self._stop_flag.set()
+        if IS_WINDOWS:
+            proc = self.process
+            if proc and proc.poll() is None:
+                try:
+                    proc.terminate()
+                except Exception:
+                    pass
+            return
+        try:
+            os.write(self._wake_w, b"x")
+        except BlockingIOError:
+            pass  # pipe already full of wake-ups
+
+    def _drain_wake(self):
+        try:
+            while os.read(self._wake_r, 4096):
+                pass
+        except BlockingIOError:
+            pass
 
     def is_running(self) -> bool:
         return self.thread is not None and self.thread.is_alive()
@@ -217,12 +434,19 @@ class StressTestApp(tk.Tk):
 
         # runtime state
         self.runner = CommandRunner(self._on_line, self._on_done)
-        self.output_queue: queue.Queue[str] = queue.Queue()
+        # Reader thread appends output chunks here; the Tk tick swaps the deque out.
+        self._out_buf: collections.deque = collections.deque()
+        self._out_lock = threading.Lock()
+        self._metrics_q: queue.Queue[dict] = queue.Queue(maxsize=1)
         self.current_log_path: str | None = None
         self.log_fp = None
         self.test_start_time: float | None = None
         self.expected_duration: int | None = None
-        self._ui_updater_running = False
+        self._ui_tick = 0
+        # Last validated value of each integer Spinbox, keyed by option name
+        self._int_opts: dict[str, int | None] = {}
+        self._int_bounds: dict[str, tuple[int, int, str]] = {}
+        self._vcmd_int = self.register(self._val_int)
         self.status_var = tk.StringVar(value="Ready.")
 
         # ---------- GRID LAYOUT ROOT ----------
@@ -241,7 +465,7 @@ class StressTestApp(tk.Tk):
 
         self._apply_theme()
         self._check_dependencies_summary()
-        self.after(100, self._drain_output_queue)
+        self.after(UI_TICK_MS, self._tick)
 
     # ---------- UI builders ----------
 
@@ -257,6 +481,7 @@ class StressTestApp(tk.Tk):
         # Tools
         tools_menu = tk.Menu(menubar, tearoff=0)
         tools_menu.add_command(label="Check Dependencies", command=self._check_dependencies_dialog)
+        tools_menu.add_command(label="Rescan Dependencies", command=self._rescan_dependencies)
         theme_menu = tk.Menu(tools_menu, tearoff=0)
         theme_menu.add_radiobutton(label="Light Mode", variable=self.theme, value="light", command=self._apply_theme)
         theme_menu.add_radiobutton(label="Dark Mode",  variable=self.theme, value="dark",  command=self._apply_theme)
@@ -286,8 +511,15 @@ class StressTestApp(tk.Tk):
 
         self.options_container = ttk.Frame(top)
         self.options_container.grid(row=1, column=0, sticky="ew", pady=(8, 0))
+        self.options_container.rowconfigure(0, weight=0)
+        self.options_container.columnconfigure(0, weight=1)
         self._build_cpu_opts(); self._build_ram_opts(); self._build_gpu_opts()
         self._build_disk_opts(); self._build_net_opts()
+        # All panes share one grid cell; switching just raises the chosen one.
+        self._option_panes = {"cpu": self.cpu_opts, "ram": self.ram_opts, "gpu": self.gpu_opts,
+                              "disk": self.disk_opts, "net": self.net_opts}
+        for f in self._option_panes.values():
+            f.grid(row=0, column=0, sticky="nsew")
         self._show_only_options("cpu")
 
         ctrl = ttk.Frame(top)
@@ -335,7 +567,7 @@ class StressTestApp(tk.Tk):
             self.gauge_dsk.set(0.0, "psutil not installed")
             self.status_var.set("Dashboard requires 'psutil' (pip install psutil).")
         else:
-            self.after(300, self._update_dashboard)
+            threading.Thread(target=self._sample_metrics, daemon=True).start()
 
     def _build_output_panel(self):
         mid = ttk.Frame(self, padding=(10, 8, 10, 10))
@@ -362,9 +594,9 @@ class StressTestApp(tk.Tk):
         self.cpu_workers = tk.IntVar(value=max(1, os.cpu_count() or 1))
         self.cpu_timeout = tk.IntVar(value=300)
         ttk.Label(f, text="Workers:").grid(row=0, column=0, sticky="w", padx=4, pady=4)
-        ttk.Spinbox(f, from_=1, to=512, textvariable=self.cpu_workers, width=7).grid(row=0, column=1, sticky="w", padx=4, pady=4)
+        self._int_spinbox(f, "cpu_workers", 1, 512, "Workers").grid(row=0, column=1, sticky="w", padx=4, pady=4)
         ttk.Label(f, text="Duration (s):").grid(row=0, column=2, sticky="w", padx=4, pady=4)
-        ttk.Spinbox(f, from_=5, to=86400, textvariable=self.cpu_timeout, width=7).grid(row=0, column=3, sticky="w", padx=4, pady=4)
+        self._int_spinbox(f, "cpu_timeout", 5, 86400, "Duration").grid(row=0, column=3, sticky="w", padx=4, pady=4)
 
     def _build_ram_opts(self):
         f = self.ram_opts = ttk.LabelFrame(self.options_container, text="RAM Options")
@@ -372,11 +604,11 @@ class StressTestApp(tk.Tk):
         self.ram_bytes = tk.StringVar(value="1G")
         self.ram_timeout = tk.IntVar(value=300)
         ttk.Label(f, text="VM Workers:").grid(row=0, column=0, sticky="w", padx=4, pady=4)
-        ttk.Spinbox(f, from_=1, to=512, textvariable=self.ram_vm_workers, width=7).grid(row=0, column=1, sticky="w", padx=4, pady=4)
+        self._int_spinbox(f, "ram_vm_workers", 1, 512, "VM Workers").grid(row=0, column=1, sticky="w", padx=4, pady=4)
         ttk.Label(f, text="Bytes per VM:").grid(row=0, column=2, sticky="w", padx=4, pady=4)
         ttk.Entry(f, textvariable=self.ram_bytes, width=10).grid(row=0, column=3, sticky="w", padx=4, pady=4)
         ttk.Label(f, text="Duration (s):").grid(row=0, column=4, sticky="w", padx=4, pady=4)
-        ttk.Spinbox(f, from_=5, to=86400, textvariable=self.ram_timeout, width=7).grid(row=0, column=5, sticky="w", padx=4, pady=4)
+        self._int_spinbox(f, "ram_timeout", 5, 86400, "Duration").grid(row=0, column=5, sticky="w", padx=4, pady=4)
 
     def _build_gpu_opts(self):
         f = self.gpu_opts = ttk.LabelFrame(self.options_container, text="GPU Options")
@@ -391,7 +623,7 @@ class StressTestApp(tk.Tk):
         ttk.Label(f, text="Size:").grid(row=0, column=0, sticky="w", padx=4, pady=4)
         ttk.Entry(f, textvariable=self.disk_size, width=10).grid(row=0, column=1, sticky="w", padx=4, pady=4)
         ttk.Label(f, text="Runtime (s):").grid(row=0, column=2, sticky="w", padx=4, pady=4)
-        ttk.Spinbox(f, from_=5, to=3600, textvariable=self.disk_runtime, width=7).grid(row=0, column=3, sticky="w", padx=4, pady=4)
+        self._int_spinbox(f, "disk_runtime", 5, 3600, "Runtime").grid(row=0, column=3, sticky="w", padx=4, pady=4)
         ttk.Label(f, text="Filename:").grid(row=0, column=4, sticky="w", padx=4, pady=4)
         ttk.Entry(f, textvariable=self.disk_filename, width=40).grid(row=0, column=5, sticky="w", padx=4, pady=4)
 
@@ -404,11 +636,49 @@ class StressTestApp(tk.Tk):
         ttk.Label(f, text="Extra args (optional):").grid(row=0, column=2, sticky="w", padx=4, pady=4)
         ttk.Entry(f, textvariable=self.net_extra_args, width=30).grid(row=0, column=3, sticky="w", padx=4, pady=4)
 
+    def _int_spinbox(self, parent, name: str, lo: int, hi: int, label: str) -> ttk.Spinbox:
+        # The validator mirrors the field into self._int_opts on every edit
+        # (None when blank), so _build_command never has to read back from Tcl.
+        var: tk.IntVar = getattr(self, name)
+        self._int_opts[name] = var.get()
+        self._int_bounds[name] = (lo, hi, label)
+
+        def on_spin():
+            self._int_opts[name] = var.get()
+
+        return ttk.Spinbox(parent, from_=lo, to=hi, textvariable=var, width=7,
+                           validate="key", validatecommand=(self._vcmd_int, "%P", name, hi),
+                           command=on_spin)
+
+    def _val_int(self, proposed: str, name: str, hi: str) -> bool:
+        if proposed == "":
+            self._int_opts[name] = None
+            return True
+        if not (proposed.isascii() and proposed.isdigit()) or int(proposed) > int(hi):
+            return False
+        self._int_opts[name] = int(proposed)
+        return True
+
+    def _int_opt(self, name: str) -> int | None:
+        # Refuse to run with a value other than the one shown in the field.
+        value = self._int_opts[name]
+        lo, hi, label = self._int_bounds[name]
+        if value is None or value < lo:
+            messagebox.showwarning("Input Error", f"{label} must be between {lo} and {hi}.")
+            return None
+        return value
+
     def _show_only_options(self, which: str):
-        for f in [self.cpu_opts, self.ram_opts, self.gpu_opts, self.disk_opts, self.net_opts]:
-            f.grid_forget()
-        {"cpu": self.cpu_opts, "ram": self.ram_opts, "gpu": self.gpu_opts,
-         "disk": self.disk_opts, "net": self.net_opts}[which].grid(row=0, column=0, sticky="ew")
+        # Stacked panes stay mapped, so keep Tab traversal (and focus) out of
+        # the ones hidden behind the raised pane.
+        focused = str(self.focus_get() or "")
+        for name, pane in self._option_panes.items():
+            shown = name == which
+            for w in pane.winfo_children():
+                w.configure(takefocus="" if shown else 0)
+            if not shown and focused.startswith(str(pane) + "."):
+                self.focus_set()
+        self._option_panes[which].tkraise()
 
     # ---------- Events ----------
 
@@ -424,20 +694,21 @@ class StressTestApp(tk.Tk):
         if not cmd:
             return
 
-        self.current_log_path = os.path.join(LOG_DIR, f"{test}_{timestamp()}.log")
+        self.current_log_path = f"{_LOG_PREFIX}{test}_{timestamp()}.log"
         try:
-            self.log_fp = open(self.current_log_path, "w", encoding="utf-8")
+            self.log_fp = open(self.current_log_path, "w", encoding="utf-8", buffering=LOG_BUFFER_SIZE)
             self.log_fp.write(f"{APP_NAME} Log - {datetime.datetime.now().isoformat()}\n")
-            self.log_fp.write(f"Command: {' '.join(cmd) if isinstance(cmd, (list, tuple)) else cmd}\n\n")
+            self.log_fp.write(f"Command: {' '.join(cmd)}\n\n")
             if env:
                 self.log_fp.write(f"Environment: {env}\n\n")
+            self.log_fp.flush()
         except Exception as e:
             self.log_fp = None
             messagebox.showerror("Logging Error", f"Cannot write log file: {e}")
             return
 
         self._set_running_ui(True, expected)
-        self._append_output(f"Starting: {cmd if isinstance(cmd, str) else ' '.join(cmd)}\n")
+        self._append_output(f"Starting: {' '.join(cmd)}\n")
         self.status_var.set("Running…")
 
         try:
@@ -447,10 +718,6 @@ class StressTestApp(tk.Tk):
             self._set_running_ui(False)
             return
 
-        if not self._ui_updater_running:
-            self._ui_updater_running = True
-            self.after(200, self._tick_progress)
-
     def _stop_clicked(self):
         if self.runner.is_running():
             self._append_output("\nStopping… attempting graceful termination.\n")
@@ -469,19 +736,30 @@ class StressTestApp(tk.Tk):
 
     def _build_command(self, test: str):
         for cmd in REQUIRED_CMDS[test]:
-            if shutil.which(cmd) is None:
+            if _which(cmd) is None:
+                # The tool may have been installed since the last scan.
+                _clear_which_cache()
+            if _which(cmd) is None:
                 messagebox.showerror("Missing Dependency", f"'{cmd}' not found.\nInstall with:\n{which_or_hint(cmd)}")
                 return None, None, None
 
         if test == "cpu":
-            workers = max(1, int(self.cpu_workers.get()))
-            duration = max(5, int(self.cpu_timeout.get()))
+            workers = self._int_opt("cpu_workers")
+            if workers is None:
+                return None, None, None
+            duration = self._int_opt("cpu_timeout")
+            if duration is None:
+                return None, None, None
             return ["stress-ng", "--cpu", str(workers), "--timeout", f"{duration}s"], duration, None
 
         if test == "ram":
-            vm = max(1, int(self.ram_vm_workers.get()))
+            vm = self._int_opt("ram_vm_workers")
+            if vm is None:
+                return None, None, None
+            duration = self._int_opt("ram_timeout")
+            if duration is None:
+                return None, None, None
             vm_bytes = self.ram_bytes.get().strip() or "512M"
-            duration = max(5, int(self.ram_timeout.get()))
             return ["stress-ng", "--vm", str(vm), "--vm-bytes", vm_bytes, "--timeout", f"{duration}s"], duration, None
 
         if test == "gpu":
@@ -489,9 +767,11 @@ class StressTestApp(tk.Tk):
 
         if test == "disk":
             size = self.disk_size.get().strip() or "1G"
-            runtime = max(5, int(self.disk_runtime.get()))
+            runtime = self._int_opt("disk_runtime")
+            if runtime is None:
+                return None, None, None
             filename = self.disk_filename.get().strip() or os.path.join(os.getcwd(), "fio_testfile.bin")
-            ioengine = "libaio" if platform.system() == "Linux" else "psync"
+            ioengine = "libaio" if IS_LINUX else "psync"
             return [
                 "fio", "--name=randrw", "--rw=randrw", f"--size={size}",
                 f"--runtime={runtime}", "--time_based=1", f"--filename={filename}",
@@ -513,38 +793,54 @@ class StressTestApp(tk.Tk):
 
     # ---------- Output & logging ----------
 
-    def _on_line(self, line: str):
-        self.output_queue.put(line)
+    def _on_line(self, chunk: str):
+        # Called from the reader thread with a whole block of output; the log
+        # is written here so the Tk loop never touches file I/O. Each chunk
+        # (up to READ_CHUNK_SIZE) is flushed right away, so nothing sits in
+        # the buffer while the child is quiet or the machine locks up.
+        with self._out_lock:
+            self._out_buf.append(chunk)
         try:
             if self.log_fp:
-                self.log_fp.write(line)
+                self.log_fp.write(chunk)
+                self.log_fp.flush()
         except Exception:
             pass
 
     def _on_done(self, returncode: int | None):
-        self.output_queue.put(f"\nProcess finished with return code: {returncode}\n")
-        self.output_queue.put("__DONE__")
+        with self._out_lock:
+            self._out_buf.append(f"\nProcess finished with return code: {returncode}\n")
+            self._out_buf.append(("__DONE__",))
 
     def _drain_output_queue(self):
-        try:
-            while True:
-                item = self.output_queue.get_nowait()
-                if item == "__DONE__":
-                    if self.log_fp:
-                        try:
-                            self.log_fp.flush(); self.log_fp.close()
-                        except Exception:
-                            pass
-                        self.log_fp = None
-                    self._set_running_ui(False)
-                    break
-                self._append_output(item)
-        except queue.Empty:
-            pass
-        self.after(100, self._drain_output_queue)
+        # Swap out everything pending under one lock acquisition and insert it
+        # in one go: one Text reflow and one auto-scroll per tick.
+        with self._out_lock:
+            buf, self._out_buf = self._out_buf, collections.deque()
+        parts = []
+        done = False
+        for item in buf:
+            if isinstance(item, tuple):
+                done = True
+            else:
+                parts.append(item)
+        if parts:
+            self._append_output("".join(parts))
+        if done:
+            if self.log_fp:
+                try:
+                    self.log_fp.flush(); self.log_fp.close()
+                except Exception:
+                    pass
+                self.log_fp = None
+            self._set_running_ui(False)
 
     def _append_output(self, text: str):
         self.output_text.insert(tk.END, text)
+        # Keep only the tail on screen; the log file still gets everything.
+        lines = int(self.output_text.index("end-1c").split(".")[0])
+        if lines > MAX_OUTPUT_LINES:
+            self.output_text.delete("1.0", f"{lines - MAX_OUTPUT_LINES}.0")
         self.output_text.see(tk.END)
 
     def _clear_output(self):
@@ -569,9 +865,9 @@ class StressTestApp(tk.Tk):
     def _open_log_folder(self):
         path = LOG_DIR
         try:
-            if platform.system() == "Darwin":
+            if IS_MAC:
                 subprocess.Popen(["open", path])
-            elif platform.system() == "Windows":
+            elif IS_WINDOWS:
                 os.startfile(path)  # type: ignore
             else:
                 subprocess.Popen(["xdg-open", path])
@@ -602,39 +898,79 @@ class StressTestApp(tk.Tk):
             self.progress.config(mode="determinate", maximum=100, value=0)
             self.eta_label.config(text="ETA: --:--")
 
+    def _tick(self):
+        # Single UI scheduler: output every tick (100 ms), progress every
+        # 2nd tick (200 ms), dashboard every 10th tick (1 s). Rescheduled in
+        # finally so one failing step can't stop the whole chain.
+        self._ui_tick += 1
+        try:
+            self._drain_output_queue()
+            if self._ui_tick % 2 == 0:
+                self._tick_progress()
+            if self._ui_tick % 10 == 0:
+                self._update_dashboard()
+        finally:
+            self.after(UI_TICK_MS, self._tick)
+
     def _tick_progress(self):
-        if self.runner.is_running():
-            if self.expected_duration and self.test_start_time:
-                elapsed = time.time() - self.test_start_time
-                value = min(self.expected_duration, max(0, elapsed))
-                self.progress.config(value=value)
-                remaining = max(0, int(self.expected_duration - elapsed))
-                mm, ss = divmod(remaining, 60)
-                self.eta_label.config(text=f"ETA: {mm:02d}:{ss:02d}")
-        else:
-            self._ui_updater_running = False
+        if not self.runner.is_running():
             return
-        self.after(200, self._tick_progress)
+        if self.expected_duration and self.test_start_time:
+            elapsed = time.time() - self.test_start_time
+            value = min(self.expected_duration, max(0, elapsed))
+            self.progress.config(value=value)
+            remaining = max(0, int(self.expected_duration - elapsed))
+            mm, ss = divmod(remaining, 60)
+            self.eta_label.config(text=f"ETA: {mm:02d}:{ss:02d}")
 
     # ---------- Dashboard updater ----------
 
+    def _sample_metrics(self):
+        # Runs on a daemon thread: disk_usage() can stall on slow filesystems,
+        # so psutil is never called from the Tk thread. Only the latest
+        # snapshot is kept in the queue.
+        while True:
+            try:
+                snap = {
+                    "cpu": psutil.cpu_percent(interval=None),
+                    "mem": psutil.virtual_memory(),
+                    "disk": psutil.disk_usage("/"),
+                }
+            except Exception as e:
+                snap = {"error": e}
+            try:
+                self._metrics_q.get_nowait()
+            except queue.Empty:
+                pass
+            try:
+                self._metrics_q.put_nowait(snap)
+            except queue.Full:
+                pass
+            time.sleep(1)
+
     def _update_dashboard(self):
         if not HAS_PSUTIL:
             return
         try:
-            cpu = psutil.cpu_percent(interval=None)
-            self.gauge_cpu.set(cpu / 100.0, "")
+            snap = self._metrics_q.get_nowait()
+        except queue.Empty:
+            snap = None
+        if snap is None:
+            return
+        if "error" in snap:
+            self.status_var.set(f"Dashboard error: {snap['error']}")
+            return
+        try:
+            self.gauge_cpu.set(snap["cpu"] / 100.0, "")
 
-            vm = psutil.virtual_memory()
+            vm = snap["mem"]
             self.gauge_mem.set(vm.percent / 100.0, f"{vm.used/(1024**3):.1f} GiB / {vm.total/(1024**3):.1f} GiB")
 
-            du = psutil.disk_usage("/")
+            du = snap["disk"]
             self.gauge_dsk.set(du.percent / 100.0, f"{du.used/(1024**3):.1f} GiB / {du.total/(1024**3):.1f} GiB")
         except Exception as e:
             self.status_var.set(f"Dashboard error: {e}")
 
-        self.after(1000, self._update_dashboard)
-
     # ---------- Theme handling ----------
 
     def _apply_theme(self):
@@ -672,13 +1008,20 @@ class StressTestApp(tk.Tk):
         missing = []
         for cmds in REQUIRED_CMDS.values():
             for c in cmds:
-                if shutil.which(c) is None and c not in missing:
+                if _which(c) is None and c not in missing:
                     missing.append(c)
         if missing:
             self.status_var.set(f"Missing tools: {', '.join(missing)} (see Tools → Check Dependencies)")
 
+    def _rescan_dependencies(self):
+        _clear_which_cache()
+        if not self.runner.is_running():
+            self.status_var.set("Ready.")
+            self._check_dependencies_summary()
+        self._check_dependencies_dialog()
+
     def _check_dependencies_dialog(self):
-        lines = [f"Dependency check ({platform.system()})"]
+        lines = [f"Dependency check ({_SYS})"]
         for cmd in sorted({c for v in REQUIRED_CMDS.values() for c in v}):
             lines.append(f" - {cmd}: {which_or_hint(cmd)}")
         if not HAS_PSUTIL:
@@ -713,7 +1056,7 @@ def main():
     app = StressTestApp()
     try:
         style = ttk.Style()
-        if platform.system() != "Windows":
+        if not IS_WINDOWS:
             style.theme_use("clam")
     except Exception:
         pass